@@ -5,7 +5,7 @@ import sqlite3
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Iterable, Iterator
 
 APP_NAME = "Noteforge"
 
@@ -25,11 +25,10 @@ def default_data_dir() -> Path:
     return home / f".{APP_NAME.lower()}"
 
 
-SCHEMA_VERSION = 1
+SCHEMA_VERSION = 3
 
 
 SCHEMA_SQL = """
-PRAGMA journal_mode=WAL;
 PRAGMA foreign_keys=ON;
 
 CREATE TABLE IF NOT EXISTS meta(
@@ -43,7 +42,8 @@ CREATE TABLE IF NOT EXISTS notes(
     body TEXT NOT NULL,
     tags TEXT NOT NULL DEFAULT '',
     created_at TEXT NOT NULL,
-    updated_at TEXT NOT NULL
+    updated_at TEXT NOT NULL,
+    tags_norm TEXT GENERATED ALWAYS AS (lower(tags)) VIRTUAL
 );
 
 -- Full-text search virtual table (requires SQLite built with FTS5; most Python builds include it)
@@ -56,20 +56,108 @@ USING fts5(
     content_rowid='id',
     tokenize='unicode61'
 );
+"""
 
--- Triggers to keep notes_fts in sync with notes
+# Triggers to keep notes_fts in sync with notes. Kept out of SCHEMA_SQL so bulk
+# imports can drop them and rebuild the index once instead of per row.
+FTS_TRIGGERS: dict[str, str] = {
+    "notes_ai": """
 CREATE TRIGGER IF NOT EXISTS notes_ai AFTER INSERT ON notes BEGIN
     INSERT INTO notes_fts(rowid, title, body, tags) VALUES (new.id, new.title, new.body, new.tags);
-END;
-
+END
+""",
+    "notes_ad": """
 CREATE TRIGGER IF NOT EXISTS notes_ad AFTER DELETE ON notes BEGIN
     INSERT INTO notes_fts(notes_fts, rowid, title, body, tags) VALUES('delete', old.id, old.title, old.body, old.tags);
-END;
-
-CREATE TRIGGER IF NOT EXISTS notes_au AFTER UPDATE ON notes BEGIN
+END
+""",
+    # FTS5 re-indexes a whole row at a time, so the useful cut is skipping
+    # updates that leave every indexed column untouched.
+    "notes_au": """
+CREATE TRIGGER IF NOT EXISTS notes_au AFTER UPDATE ON notes
+WHEN old.title IS NOT new.title
+  OR old.body IS NOT new.body
+  OR old.tags IS NOT new.tags
+BEGIN
     INSERT INTO notes_fts(notes_fts, rowid, title, body, tags) VALUES('delete', old.id, old.title, old.body, old.tags);
     INSERT INTO notes_fts(rowid, title, body, tags) VALUES (new.id, new.title, new.body, new.tags);
-END;
+END
+""",
+}
+
+# Rows per list_note_rows page; the view asks for more as it scrolls.
+PAGE_SIZE = 200
+
+# Imports at least this large, and at least half the size of the existing table,
+# skip the per-row FTS triggers and rebuild the index in one pass. 'rebuild'
+# re-tokenizes every note, so smaller imports are cheaper to index incrementally.
+FTS_REBUILD_MIN_ROWS = 500
+
+
+# Statement texts are kept as constants so every call hits sqlite3's
+# compiled-statement cache instead of re-preparing the SQL.
+
+# Timestamps for new writes come from SQLite itself, in the same UTC format
+# utc_now_iso() produces, so the hot path skips Python datetime handling.
+_SQL_NOW = "strftime('%Y-%m-%dT%H:%M:%S+00:00', 'now')"
+
+_SQL_INSERT = f"""
+INSERT INTO notes(title, body, tags, created_at, updated_at)
+VALUES(?, ?, ?, {_SQL_NOW}, {_SQL_NOW})
+"""
+# Same order as Note's fields: rows are unpacked straight into Note(*row).
+_NOTE_COLUMNS = "id, title, body, tags, created_at, updated_at"
+# What the notes list displays; leaves out body, which can be large.
+_ROW_COLUMNS = "id, title, tags, updated_at"
+
+_SQL_GET = f"SELECT {_NOTE_COLUMNS} FROM notes WHERE id=?"
+_SQL_UPDATE = f"""
+UPDATE notes SET title=?, body=?, tags=?, updated_at={_SQL_NOW}
+WHERE id=?
+RETURNING {_NOTE_COLUMNS}
+"""
+_SQL_DELETE = "DELETE FROM notes WHERE id=?"
+_SQL_LIST_ALL = f"SELECT {_NOTE_COLUMNS} FROM notes ORDER BY updated_at DESC"
+_SQL_ROWS_ALL = f"""
+SELECT {_ROW_COLUMNS} FROM notes
+ORDER BY updated_at DESC
+LIMIT ? OFFSET ?
+"""
+# A leading-wildcard LIKE can't seek, but scanning the small tags_norm index and
+# only visiting matching rows beats scanning the table with every body in it.
+_SQL_ROWS_TAG = f"""
+SELECT {_ROW_COLUMNS} FROM notes INDEXED BY idx_notes_tags_norm
+WHERE tags_norm LIKE ?
+ORDER BY updated_at DESC
+LIMIT ? OFFSET ?
+"""
+
+
+def _search_rows_sql(ranked: bool) -> str:
+    # Ordering by f.rank (bm25) is resolved inside FTS5, so SQLite can stop
+    # after LIMIT rows instead of sorting every match.
+    order = "f.rank" if ranked else "n.updated_at DESC"
+    return f"""
+SELECT n.id, n.title, n.tags, n.updated_at
+FROM notes_fts f
+JOIN notes n ON n.id = f.rowid
+WHERE notes_fts MATCH ?
+ORDER BY {order}
+LIMIT ? OFFSET ?
+"""
+
+
+_SQL_SEARCH_ROWS = {r: _search_rows_sql(r) for r in (False, True)}
+
+_SQL_EXISTS = "SELECT id FROM notes WHERE id=?"
+_SQL_COUNT = "SELECT COUNT(*) FROM notes"
+_SQL_IMPORT_INSERT = (
+    "INSERT INTO notes(title, body, tags, created_at, updated_at) VALUES(?,?,?,?,?)"
+)
+_SQL_IMPORT_UPDATE = """
+UPDATE notes
+SET title=?, body=?, tags=?, created_at=?, updated_at=?
+WHERE id=?
 """
 
 
@@ -84,22 +172,119 @@ class Note:
 
 
 class NoteDB:
-    def __init__(self, db_path: Path):
+    def __init__(
+        self,
+        db_path: Path,
+        check_same_thread: bool = True,
+        readonly_mirror: bool = True,
+    ):
+        """
+        readonly_mirror=False is for secondary write-only handles (the writer
+        thread): the schema is assumed initialised by the primary NoteDB, and
+        reads share the write connection instead of opening their own.
+        """
         self.db_path = db_path
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self.con = sqlite3.connect(str(self.db_path))
-        self.con.row_factory = sqlite3.Row
+        # Autocommit mode: single statements commit on their own and
+        # multi-statement work opens an explicit transaction.
+        self.con = sqlite3.connect(
+            str(self.db_path),
+            cached_statements=256,
+            isolation_level=None,
+            check_same_thread=check_same_thread,
+        )
+        self._cur = self.con.cursor()
+        self._apply_pragmas()
+        if not readonly_mirror:
+            self.ro_con = self.con
+            self._ro_cur = self._cur
+            return
+
         self._init_db()
+        # 0x10000 (SQLite 3.46+) checks every table, not just ones this
+        # connection has queried; older versions ignore the bit.
+        self.con.execute("PRAGMA optimize=0x10002")
+
+        # Reads get their own connection (and page cache) so they never queue
+        # behind a write; WAL lets them see every committed change.
+        self.ro_con = self._connect_ro(check_same_thread)
+        self._ro_cur = self.ro_con.cursor()
+
+    def optimize(self) -> None:
+        """Refresh query-planner statistics where they have drifted; cheap when not."""
+        self._cur.execute("PRAGMA optimize")
 
     def close(self) -> None:
         try:
-            self.con.close()
+            self.optimize()
         except Exception:
             pass
+        for con in {self.ro_con, self.con}:
+            try:
+                con.close()
+            except Exception:
+                pass
+
+    def _apply_pragmas(self) -> None:
+        # page_size only takes effect on a fresh database and must be set before
+        # switching to WAL; on an existing file it is a harmless no-op.
+        self.con.execute("PRAGMA page_size=4096")
+        # journal_mode is persistent and reports the mode actually in effect,
+        # so check it rather than assuming the switch succeeded.
+        mode = self.con.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        if str(mode).lower() != "wal":
+            raise RuntimeError(
+                f"Could not enable WAL journal mode for {self.db_path} (got {mode!r})."
+            )
+        # Under WAL, NORMAL only syncs on checkpoint and is still corruption-safe,
+        # so autosave commits no longer pay an fsync each.
+        self.con.execute("PRAGMA synchronous=NORMAL")
+        self.con.execute("PRAGMA wal_autocheckpoint=1000")
+        self._apply_read_pragmas(self.con)
+
+    def _connect_ro(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        con = sqlite3.connect(
+            f"{self.db_path.resolve().as_uri()}?mode=ro",
+            uri=True,
+            cached_statements=256,
+            isolation_level=None,
+            check_same_thread=check_same_thread,
+        )
+        self._apply_read_pragmas(con)
+        return con
+
+    @staticmethod
+    def _apply_read_pragmas(con: sqlite3.Connection) -> None:
+        con.execute("PRAGMA temp_store=MEMORY")
+        con.execute("PRAGMA cache_size=-65536")  # 64 MiB
+        con.execute("PRAGMA busy_timeout=5000")
+        # Serve reads straight from the OS page cache; the mapping never grows
+        # past the actual file size, so small databases pay nothing for it.
+        con.execute("PRAGMA mmap_size=268435456")  # 256 MiB
 
     def _init_db(self) -> None:
-        cur = self.con.cursor()
+        cur = self._cur
+        # UPDATE ... RETURNING needs 3.35 (generated columns 3.31); without this
+        # check an older SQLite only fails later, on the first autosave.
+        if sqlite3.sqlite_version_info < (3, 35, 0):
+            raise RuntimeError(
+                f"SQLite {sqlite3.sqlite_version} is too old; Noteforge needs 3.35 "
+                "or newer. Try a different Python distribution or a newer SQLite."
+            )
+        # Validate FTS5 availability up front for a clearer error than the
+        # "no such module" the schema script would raise.
+        cur.execute(
+            "SELECT 1 FROM pragma_compile_options WHERE compile_options='ENABLE_FTS5'"
+        )
+        if cur.fetchone() is None:
+            raise RuntimeError(
+                "SQLite FTS5 is not available in this Python/SQLite build. "
+                "Try a different Python distribution or rebuild SQLite with FTS5."
+            )
+
         cur.executescript(SCHEMA_SQL)
+        for trigger_sql in FTS_TRIGGERS.values():
+            cur.execute(trigger_sql)
         cur.execute("SELECT value FROM meta WHERE key='schema_version'")
         row = cur.fetchone()
         if row is None:
@@ -107,131 +292,135 @@ class NoteDB:
                 "INSERT INTO meta(key, value) VALUES('schema_version', ?)",
                 (str(SCHEMA_VERSION),),
             )
-        self.con.commit()
-
-        # Validate FTS5 availability early for clearer error messages.
-        try:
-            cur.execute("SELECT notes_fts('test')")
-        except sqlite3.OperationalError as e:
-            # notes_fts('test') returns error normally; better check by running a match query
-            try:
+        elif int(row[0]) < SCHEMA_VERSION:
+            version = int(row[0])
+            cur.execute("BEGIN")
+            if version < 2:
+                # v2: lowercased tags column backing the tag filter index.
                 cur.execute(
-                    "SELECT rowid FROM notes_fts WHERE notes_fts MATCH 'test' LIMIT 1"
+                    "ALTER TABLE notes ADD COLUMN "
+                    "tags_norm TEXT GENERATED ALWAYS AS (lower(tags)) VIRTUAL"
                 )
-            except sqlite3.OperationalError as e2:
-                raise RuntimeError(
-                    "SQLite FTS5 is not available in this Python/SQLite build. "
-                    "Try a different Python distribution or rebuild SQLite with FTS5."
-                ) from e2
-
-    def _row_to_note(self, r: sqlite3.Row) -> Note:
-        return Note(
-            id=int(r["id"]),
-            title=str(r["title"]),
-            body=str(r["body"]),
-            tags=str(r["tags"]),
-            created_at=str(r["created_at"]),
-            updated_at=str(r["updated_at"]),
+            if version < 3:
+                # v3: notes_au only fires when an indexed column changes.
+                cur.execute("DROP TRIGGER IF EXISTS notes_au")
+                cur.execute(FTS_TRIGGERS["notes_au"])
+            cur.execute(
+                "UPDATE meta SET value=? WHERE key='schema_version'",
+                (str(SCHEMA_VERSION),),
+            )
+            cur.execute("COMMIT")
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_notes_tags_norm ON notes(tags_norm)"
         )
 
     def create_note(
         self, title: str = "Untitled", body: str = "", tags: str = ""
     ) -> int:
-        now = utc_now_iso()
-        cur = self.con.cursor()
-        cur.execute(
-            "INSERT INTO notes(title, body, tags, created_at, updated_at) VALUES(?,?,?,?,?)",
-            (title.strip() or "Untitled", body, tags, now, now),
-        )
-        self.con.commit()
+        cur = self._cur
+        cur.execute(_SQL_INSERT, (title.strip() or "Untitled", body, tags))
         return int(cur.lastrowid)
 
     def get_note(self, note_id: int) -> Note | None:
-        cur = self.con.cursor()
-        cur.execute("SELECT * FROM notes WHERE id=?", (note_id,))
+        cur = self._ro_cur
+        cur.execute(_SQL_GET, (note_id,))
         row = cur.fetchone()
-        return self._row_to_note(row) if row else None
-
-    def update_note(self, note_id: int, title: str, body: str, tags: str) -> None:
-        now = utc_now_iso()
-        self.con.execute(
-            "UPDATE notes SET title=?, body=?, tags=?, updated_at=? WHERE id=?",
-            (title.strip() or "Untitled", body, tags, now, note_id),
-        )
-        self.con.commit()
-
-    def delete_note(self, note_id: int) -> None:
-        self.con.execute("DELETE FROM notes WHERE id=?", (note_id,))
-        self.con.commit()
-
-    def list_notes(self, search: str = "", tag_filter: str = "") -> list[Note]:
+        return Note(*row) if row else None
+
+    def update_note(
+        self, note_id: int, title: str, body: str, tags: str
+    ) -> Note | None:
+        """Returns the note as stored, or None if it no longer exists."""
+        cur = self._cur
+        cur.execute(_SQL_UPDATE, (title.strip() or "Untitled", body, tags, note_id))
+        row = cur.fetchone()
+        return Note(*row) if row else None
+
+    def delete_note(self, note_id: int) -> bool:
+        """Returns True if a note was deleted."""
+        cur = self._cur
+        cur.execute(_SQL_DELETE, (note_id,))
+        return cur.rowcount > 0
+
+    def list_note_rows(
+        self,
+        search: str = "",
+        tag_filter: str = "",
+        limit: int = PAGE_SIZE,
+        offset: int = 0,
+        ranked: bool = False,
+    ) -> list[tuple[int, str, str, str]]:
         """
+        One page of the notes list as (id, title, tags, updated_at) tuples.
         - search: full-text query. We use a simple strategy:
           - if empty -> list all notes ordered by updated desc
           - else -> FTS MATCH across title/body/tags
         - tag_filter: substring filter on tags (comma-separated), for quick narrowing.
+          Combined with a search, each comma-separated tag is instead matched as a
+          word prefix in the FTS tags column.
+        - limit/offset: the page to return.
+        - ranked: order search matches by relevance (bm25) instead of updated desc.
         """
         search = (search or "").strip()
         tag_filter = (tag_filter or "").strip().lower()
 
-        cur = self.con.cursor()
+        cur = self._ro_cur
 
         if not search:
             if tag_filter:
-                cur.execute(
-                    """
-                    SELECT * FROM notes
-                    WHERE LOWER(tags) LIKE ?
-                    ORDER BY updated_at DESC
-                    """,
-                    (f"%{tag_filter}%",),
-                )
+                cur.execute(_SQL_ROWS_TAG, (f"%{tag_filter}%", limit, offset))
             else:
-                cur.execute("SELECT * FROM notes ORDER BY updated_at DESC")
-            return [self._row_to_note(r) for r in cur.fetchall()]
+                cur.execute(_SQL_ROWS_ALL, (limit, offset))
+        else:
+            cur.execute(
+                _SQL_SEARCH_ROWS[ranked],
+                (self._fts_query(search, tag_filter), limit, offset),
+            )
+        return cur.fetchall()
 
+    @staticmethod
+    def _fts_query(search: str, tag_filter: str = "") -> str:
         # Basic FTS query sanitization:
         # - Wrap in quotes to treat as a phrase by default
         # - Allow advanced users to type FTS operators (AND/OR/NEAR/*) if they want
-        fts_query = search
         if any(
             tok in search
             for tok in ('"', " AND ", " OR ", " NOT ", " NEAR ", "*", ":", "(", ")")
         ):
             # assume user knows what they're doing
-            pass
+            fts_query = search
         else:
             fts_query = f"{search}*"
 
-        if tag_filter:
-            cur.execute(
-                """
-                SELECT n.*
-                FROM notes_fts f
-                JOIN notes n ON n.id = f.rowid
-                WHERE notes_fts MATCH ?
-                  AND LOWER(n.tags) LIKE ?
-                ORDER BY n.updated_at DESC
-                """,
-                (fts_query, f"%{tag_filter}%"),
+        # Narrow by tag inside the same index probe: every comma-separated tag
+        # becomes a quoted prefix phrase restricted to the tags column.
+        tags = [t.strip() for t in tag_filter.split(",") if t.strip()]
+        if tags:
+            tag_query = " AND ".join(
+                'tags:"{}"*'.format(t.replace('"', '""')) for t in tags
             )
-        else:
-            cur.execute(
-                """
-                SELECT n.*
-                FROM notes_fts f
-                JOIN notes n ON n.id = f.rowid
-                WHERE notes_fts MATCH ?
-                ORDER BY n.updated_at DESC
-                """,
-                (fts_query,),
-            )
-        return [self._row_to_note(r) for r in cur.fetchall()]
+            fts_query = f"({fts_query}) AND {tag_query}"
+        return fts_query
 
-    def all_notes_as_dicts(self) -> list[dict[str, Any]]:
-        cur = self.con.cursor()
-        cur.execute("SELECT * FROM notes ORDER BY updated_at DESC")
-        return [dict(r) for r in cur.fetchall()]
+    def iter_notes_as_dicts(self) -> Iterator[dict[str, Any]]:
+        """
+        Yield every note as a plain dict, newest first, without materializing
+        the whole table. Uses its own short-lived read connection, opened on
+        first iteration, so it can be consumed from a worker thread.
+        """
+        con = self._connect_ro()
+        try:
+            for row in con.execute(_SQL_LIST_ALL):
+                yield {
+                    "id": row[0],
+                    "title": row[1],
+                    "body": row[2],
+                    "tags": row[3],
+                    "created_at": row[4],
+                    "updated_at": row[5],
+                }
+        finally:
+            con.close()
 
     def import_notes(
         self, notes: Iterable[dict[str, Any]], merge: bool = True
@@ -240,45 +429,62 @@ class NoteDB:
         Returns (inserted, updated). If merge=True:
         - if an 'id' exists and matches, update it
         - else insert new (new id)
-        """
-        inserted = 0
-        updated = 0
-        cur = self.con.cursor()
 
+        Runs as a single transaction; large imports bypass the FTS triggers and
+        rebuild the full-text index once at the end.
+        """
+        rows: list[tuple[int | None, str, str, str, str, str]] = []
         for n in notes:
-            title = str(n.get("title", "Untitled"))
-            body = str(n.get("body", ""))
-            tags = str(n.get("tags", ""))
-            created_at = str(n.get("created_at") or utc_now_iso())
-            updated_at = str(n.get("updated_at") or utc_now_iso())
-
+            note_id_int = None
             note_id = n.get("id")
             if merge and note_id is not None:
                 try:
                     note_id_int = int(note_id)
                 except Exception:
                     note_id_int = None
+            rows.append(
+                (
+                    note_id_int,
+                    str(n.get("title", "Untitled")),
+                    str(n.get("body", "")),
+                    str(n.get("tags", "")),
+                    str(n.get("created_at") or utc_now_iso()),
+                    str(n.get("updated_at") or utc_now_iso()),
+                )
+            )
 
+        cur = self._cur
+
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            bypass_triggers = len(rows) >= FTS_REBUILD_MIN_ROWS
+            if bypass_triggers:
+                existing = cur.execute(_SQL_COUNT).fetchone()[0]
+                bypass_triggers = len(rows) >= existing // 2
+
+            insert_rows: list[tuple[str, str, str, str, str]] = []
+            update_rows: list[tuple[str, str, str, str, str, int]] = []
+            for note_id_int, *fields in rows:
                 if note_id_int is not None:
-                    cur.execute("SELECT id FROM notes WHERE id=?", (note_id_int,))
-                    exists = cur.fetchone() is not None
-                    if exists:
-                        cur.execute(
-                            """
-                            UPDATE notes
-                            SET title=?, body=?, tags=?, created_at=?, updated_at=?
-                            WHERE id=?
-                            """,
-                            (title, body, tags, created_at, updated_at, note_id_int),
-                        )
-                        updated += 1
+                    cur.execute(_SQL_EXISTS, (note_id_int,))
+                    if cur.fetchone() is not None:
+                        update_rows.append((*fields, note_id_int))
                         continue
-
-            cur.execute(
-                "INSERT INTO notes(title, body, tags, created_at, updated_at) VALUES(?,?,?,?,?)",
-                (title, body, tags, created_at, updated_at),
-            )
-            inserted += 1
-
-        self.con.commit()
-        return inserted, updated
+                insert_rows.append(tuple(fields))
+
+            if bypass_triggers:
+                for name in FTS_TRIGGERS:
+                    cur.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+            cur.executemany(_SQL_IMPORT_UPDATE, update_rows)
+            cur.executemany(_SQL_IMPORT_INSERT, insert_rows)
+
+            if bypass_triggers:
+                for trigger_sql in FTS_TRIGGERS.values():
+                    cur.execute(trigger_sql)
+                cur.execute("INSERT INTO notes_fts(notes_fts) VALUES('rebuild')")
+        except BaseException:
+            cur.execute("ROLLBACK")
+            raise
+        cur.execute("COMMIT")
+        return len(insert_rows), len(update_rows)
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import sys
+from functools import partial
 from pathlib import Path
+from typing import Any
 
 from PySide6.QtCore import (
     QItemSelection,
@@ -12,6 +14,7 @@ from PySide6.QtCore import (
     QTimer,
     Qt,
 )
+from PySide6.QtGui import QTextDocument
 from PySide6.QtWidgets import (
     QApplication,
     QFileDialog,
@@ -19,15 +22,18 @@ from PySide6.QtWidgets import (
     QMessageBox,
 )
 
-from database import NoteDB, default_data_dir
+from database import Note, NoteDB, default_data_dir
 from models import NotesTableModel
 from ui import MainWindowUI
 from workers import (
     FunctionWorker,
+    bulk_import,
     export_notes_to_json,
     import_notes_from_json,
     ExportResult,
     ImportResult,
+    WriterThread,
+    render_markdown,
 )
 
 
@@ -36,20 +42,46 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.db = db
         self.ui = MainWindowUI()
-        self.ui.setup(self)
+        self.ui.setup_core(self)
+        # Toolbar and menus are built once the event loop is idle after show()
+        QTimer.singleShot(0, self._setup_chrome)
 
         self.thread_pool = QThreadPool.globalInstance()
         self.settings = QSettings("noteforge", "Noteforge")
+        # Read each key from the backing store (the registry on Windows) once
+        self._settings_cache: dict[str, Any] = {}
+        # Quitting from the macOS app menu doesn't always deliver closeEvent
+        QApplication.instance().aboutToQuit.connect(self._flush_settings)
+
+        # All writes go through a dedicated writer thread so the UI never
+        # waits on disk; reads stay on self.db.
+        self.writer = WriterThread(db.db_path, self)
+        self.writer.error.connect(
+            lambda msg: QMessageBox.critical(self, "Save failed", msg)
+        )
+        self.writer.start()
+
+        # Keep planner statistics fresh as the notes table grows
+        self.optimize_timer = QTimer(self)
+        self.optimize_timer.setInterval(15 * 60 * 1000)
+        self.optimize_timer.timeout.connect(lambda: self.writer.submit(NoteDB.optimize))
+        self.optimize_timer.start()
 
         self.model = NotesTableModel(db)
         self.ui.table.setModel(self.model)
 
         self.current_note_id: int | None = None
         self._dirty = False
-
-        # Autosave debounce
+        self._loaded_sig: int | None = None  # hash of the last loaded/saved content
+        self._preview_src: tuple[str, str, str] | None = None  # last rendered input
+        self._preview_seq = 0  # bumped per render request; stale results are dropped
+        self._preview_doc: QTextDocument | None = None  # keeps the shown document alive
+        # In-flight render workers by seq; their signals must outlive the queued result
+        self._preview_workers: dict[int, FunctionWorker] = {}
+        self._pending_saves: dict[int, int] = {}  # note id -> queued saves
+
+        # Autosave debounce (interval scales with note length, see _mark_dirty)
         self.save_timer = QTimer(self)
-        self.save_timer.setInterval(600)
         self.save_timer.setSingleShot(True)
         self.save_timer.timeout.connect(self._commit_note)
 
@@ -59,17 +91,23 @@ class MainWindow(QMainWindow):
         self.preview_timer.setSingleShot(True)
         self.preview_timer.timeout.connect(self._render_preview)
 
+        # Filter debounce: one list query per typing pause, not per keystroke
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setInterval(250)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.timeout.connect(self._apply_filters)
+
         self._wire()
         self._restore_state()
 
-        # Load initial list + select last note or create one
-        self.model.reload()
+        # Load initial list (with restored filters) + select last note or create one
+        self.model.set_filters(self.ui.search.text(), self.ui.tag_filter.text())
         self._select_initial_note()
 
     def _wire(self) -> None:
         # Search / tag filter
-        self.ui.search.textChanged.connect(self._on_filters_changed)
-        self.ui.tag_filter.textChanged.connect(self._on_filters_changed)
+        self.ui.search.textChanged.connect(lambda: self.filter_timer.start())
+        self.ui.tag_filter.textChanged.connect(lambda: self.filter_timer.start())
 
         # Selection changes
         sel = self.ui.table.selectionModel()
@@ -79,6 +117,27 @@ class MainWindow(QMainWindow):
         self.ui.btn_new.clicked.connect(self.new_note)
         self.ui.btn_delete.clicked.connect(self.delete_current_note)
 
+        # Editor changes -> mark dirty + debounce save and preview
+        self.ui.title.textChanged.connect(self._on_editor_changed)
+        self.ui.tags.textChanged.connect(self._on_editor_changed)
+        self.ui.body.textChanged.connect(self._on_editor_changed)
+        self.ui.editor_split.splitterMoved.connect(lambda: self.preview_timer.start())
+
+    def _get_setting(self, key: str, default: Any = None) -> Any:
+        if key not in self._settings_cache:
+            self._settings_cache[key] = self.settings.value(key, default)
+        return self._settings_cache[key]
+
+    def _set_setting(self, key: str, value: Any) -> None:
+        # Only touch the backing store for values that actually changed
+        if key in self._settings_cache and self._settings_cache[key] == value:
+            return
+        self._settings_cache[key] = value
+        self.settings.setValue(key, value)
+
+    def _setup_chrome(self) -> None:
+        self.ui.setup_chrome(self)
+
         self.ui.act_new.triggered.connect(self.new_note)
         self.ui.act_delete.triggered.connect(self.delete_current_note)
         self.ui.act_export.triggered.connect(self.export_json)
@@ -86,50 +145,52 @@ class MainWindow(QMainWindow):
         self.ui.act_focus_search.triggered.connect(lambda: self.ui.search.setFocus())
         self.ui.act_about.triggered.connect(self.about)
 
-        # Editor changes -> mark dirty + debounce save
-        self.ui.title.textChanged.connect(self._mark_dirty)
-        self.ui.tags.textChanged.connect(self._mark_dirty)
-        self.ui.body.textChanged.connect(self._mark_dirty)
-
-        # Preview updates
-        self.ui.title.textChanged.connect(lambda: self.preview_timer.start())
-        self.ui.tags.textChanged.connect(lambda: self.preview_timer.start())
-        self.ui.body.textChanged.connect(lambda: self.preview_timer.start())
+        # Restored here because it places the toolbar, which now exists
+        state = self._get_setting("window/state")
+        if state is not None:
+            self.restoreState(state)
 
     def _restore_state(self) -> None:
-        geo = self.settings.value("window/geometry")
+        geo = self._get_setting("window/geometry")
         if geo is not None:
             self.restoreGeometry(geo)
-        state = self.settings.value("window/state")
-        if state is not None:
-            self.restoreState(state)
 
-        split = self.settings.value("ui/splitter")
+        split = self._get_setting("ui/splitter")
         if split is not None:
             self.ui.splitter.restoreState(split)
 
-        es = self.settings.value("ui/editor_split")
+        es = self._get_setting("ui/editor_split")
         if es is not None:
             self.ui.editor_split.restoreState(es)
 
-        self.ui.search.setText(self.settings.value("filters/search", ""))
-        self.ui.tag_filter.setText(self.settings.value("filters/tag", ""))
+        # Blocked so restoring text doesn't schedule a filter reload; __init__
+        # loads the list once with these filters.
+        with QSignalBlocker(self.ui.search):
+            self.ui.search.setText(self._get_setting("filters/search", ""))
+        with QSignalBlocker(self.ui.tag_filter):
+            self.ui.tag_filter.setText(self._get_setting("filters/tag", ""))
 
     def closeEvent(self, event) -> None:
         # Best-effort commit before closing
         self._commit_note()
-        self.settings.setValue("window/geometry", self.saveGeometry())
-        self.settings.setValue("window/state", self.saveState())
-        self.settings.setValue("ui/splitter", self.ui.splitter.saveState())
-        self.settings.setValue("ui/editor_split", self.ui.editor_split.saveState())
-        self.settings.setValue("filters/search", self.ui.search.text())
-        self.settings.setValue("filters/tag", self.ui.tag_filter.text())
-        if self.current_note_id is not None:
-            self.settings.setValue("notes/last_id", self.current_note_id)
+        self.writer.stop()
+        self._flush_settings()
         super().closeEvent(event)
 
+    def _flush_settings(self) -> None:
+        # Runs from closeEvent and aboutToQuit; unchanged keys are not rewritten.
+        self._set_setting("window/geometry", self.saveGeometry())
+        self._set_setting("window/state", self.saveState())
+        self._set_setting("ui/splitter", self.ui.splitter.saveState())
+        self._set_setting("ui/editor_split", self.ui.editor_split.saveState())
+        self._set_setting("filters/search", self.ui.search.text())
+        self._set_setting("filters/tag", self.ui.tag_filter.text())
+        if self.current_note_id is not None:
+            self._set_setting("notes/last_id", self.current_note_id)
+        self.settings.sync()
+
     def _select_initial_note(self) -> None:
-        last_id = self.settings.value("notes/last_id")
+        last_id = self._get_setting("notes/last_id")
         if last_id is not None:
             try:
                 last_id = int(last_id)
@@ -138,13 +199,14 @@ class MainWindow(QMainWindow):
 
         # If we have any notes, select last_id if it exists, else first row.
         if self.model.rowCount() > 0:
-            row_to_select = 0
+            row_to_select = None
             if last_id is not None:
-                for r in range(self.model.rowCount()):
-                    if self.model.note_id_at(r) == last_id:
-                        row_to_select = r
-                        break
-            self._select_row(row_to_select)
+                row_to_select = self.model.row_for_id(last_id)
+                # Older notes sit beyond the first page; page them in until found.
+                while row_to_select is None and self.model.canFetchMore():
+                    self.model.fetchMore()
+                    row_to_select = self.model.row_for_id(last_id)
+            self._select_row(row_to_select or 0)
             return
 
         # else create one
@@ -157,8 +219,11 @@ class MainWindow(QMainWindow):
         self.ui.table.scrollTo(idx)
         self.ui.table.selectRow(row)
 
-    def _on_filters_changed(self) -> None:
-        # Commit current edits before reloading list, so search results include latest text.
+    def _apply_filters(self) -> None:
+        # Wait for queued saves so search results include the latest text; other
+        # queued writes (an import) don't block typing in the filter.
+        if self._pending_saves:
+            self.writer.flush()
         self.model.set_filters(
             self.ui.search.text(),
             self.ui.tag_filter.text(),
@@ -174,21 +239,28 @@ class MainWindow(QMainWindow):
         # Commit previous note before switching
         self._commit_note()
 
-        indexes = selected.indexes()
-        if not indexes:
+        # Read the live selection rather than `selected`: a diff reload that
+        # removes the selected row emits this more than once, and only the
+        # selection model reflects where it ended up.
+        rows = self.ui.table.selectionModel().selectedRows()
+        if not rows:
             self._load_note(None)
             return
 
-        note_id = self.model.data(indexes[0], role=Qt.UserRole)
+        note_id = self.model.data(rows[0], role=Qt.UserRole)
         try:
             note_id = int(note_id)
         except Exception:
             note_id = None
+        if note_id is not None and note_id == self.current_note_id:
+            # Same note re-selected after a list refresh; keep the editor as is.
+            return
         self._load_note(note_id)
 
     def _load_note(self, note_id: int | None) -> None:
         self.current_note_id = note_id
         self._dirty = False
+        self._loaded_sig = None
 
         # Block signals to avoid triggering save/preview timers while loading
         blockers = [
@@ -202,10 +274,15 @@ class MainWindow(QMainWindow):
             self.ui.title.setText("")
             self.ui.tags.setText("")
             self.ui.body.setPlainText("")
+            self._preview_seq += 1
             self.ui.preview.setMarkdown("")
+            self._preview_src = None
             self.ui.status.showMessage("No note selected.", 2500)
             return
 
+        if note_id in self._pending_saves:
+            # Don't read back a version older than what is queued for saving.
+            self.writer.flush()
         note = self.db.get_note(note_id)
         if note is None:
             self.ui.status.showMessage(
@@ -217,13 +294,22 @@ class MainWindow(QMainWindow):
         self.ui.title.setText(note.title)
         self.ui.tags.setText(note.tags)
         self.ui.body.setPlainText(note.body)
+        self._loaded_sig = hash((note.title, note.body, note.tags))
         self._render_preview()
         self.ui.status.showMessage(f"Loaded note #{note_id}", 1500)
 
+    def _on_editor_changed(self) -> None:
+        self._mark_dirty()
+        self.preview_timer.start()
+
     def _mark_dirty(self) -> None:
         if self.current_note_id is None:
             return
         self._dirty = True
+        # Longer notes save less often while typing: 500 ms, up to 2.5 s at 500k chars.
+        # characterCount() is O(1), unlike toPlainText() on every keystroke.
+        chars = self.ui.body.document().characterCount()
+        self.save_timer.setInterval(max(500, min(2500, chars // 200)))
         self.save_timer.start()
 
     def _commit_note(self) -> None:
@@ -234,45 +320,98 @@ class MainWindow(QMainWindow):
         tags = self.ui.tags.text()
         body = self.ui.body.toPlainText()
 
-        self.db.update_note(note_id, title=title, body=body, tags=tags)
+        # Typing then undoing leaves nothing to save; skip the write and re-index.
+        sig = hash((title, body, tags))
+        if sig == self._loaded_sig:
+            self._dirty = False
+            return
+        self._loaded_sig = sig
+
+        self._pending_saves[note_id] = self._pending_saves.get(note_id, 0) + 1
+        self.writer.submit(
+            NoteDB.update_note,
+            note_id,
+            title,
+            body,
+            tags,
+            callback=partial(self._on_note_saved, note_id),
+        )
         self._dirty = False
 
-        # Refresh list (keeps ordering by updated_at)
-        prev_id = self.current_note_id
-        self.model.reload()
+    def _on_note_saved(self, note_id: int, note: Note | None) -> None:
+        pending = self._pending_saves.get(note_id, 0) - 1
+        if pending > 0:
+            self._pending_saves[note_id] = pending
+        else:
+            self._pending_saves.pop(note_id, None)
+        if note is None:
+            # Deleted while the save was queued, or the write failed.
+            return
 
-        # Try to reselect same note
-        if prev_id is not None:
-            for r in range(self.model.rowCount()):
-                if self.model.note_id_at(r) == prev_id:
-                    self._select_row(r)
-                    break
+        # Patch the edited row in place from the UPDATE's RETURNING row; it
+        # moves to the top with its selection.
+        self.model.row_updated(note.id, note.title, note.tags, note.updated_at)
+        row = self.model.row_for_id(note_id)
+        if row is not None:
+            self.ui.table.scrollTo(self.model.index(row, 0))
 
         self.ui.status.showMessage("Saved.", 800)
 
     def _render_preview(self) -> None:
+        # A collapsed preview isn't rendered; expanding the splitter catches up.
+        # Before the window is shown every splitter size is 0, so render anyway.
+        if self.isVisible() and self.ui.editor_split.sizes()[1] == 0:
+            return
         # Render markdown from editor
         title = self.ui.title.text().strip()
         tags = self.ui.tags.text().strip()
         body = self.ui.body.toPlainText()
+        # Edits that don't change the rendered input (e.g. trailing spaces in the
+        # title, or typing then undoing) skip the full re-parse and re-layout.
+        src = (title, tags, body)
+        if src == self._preview_src:
+            return
+        self._preview_src = src
         prefix = ""
         if title:
             prefix += f"# {title}\n\n"
         if tags:
             prefix += f"*Tags:* `{tags}`\n\n---\n\n"
         md = prefix + body
-        self.ui.preview.setMarkdown(md)
+
+        # Parse on the thread pool; only the finished document is swapped in here.
+        self._preview_seq += 1
+        seq = self._preview_seq
+        worker = FunctionWorker(
+            render_markdown, md, self.ui.preview.font(), self.thread()
+        )
+        worker.signals.finished.connect(partial(self._on_preview_ready, seq))
+        worker.signals.error.connect(lambda _msg: self._preview_workers.pop(seq, None))
+        self._preview_workers[seq] = worker
+        self.thread_pool.start(worker)
+
+    def _on_preview_ready(self, seq: int, doc: object) -> None:
+        self._preview_workers.pop(seq, None)
+        if seq != self._preview_seq or not isinstance(doc, QTextDocument):
+            # A newer render was requested after this one started.
+            return
+        self.ui.preview.setDocument(doc)
+        self._preview_doc = doc
 
     # Actions
     def new_note(self) -> None:
         self._commit_note()
-        new_id = self.db.create_note()
+        self.writer.submit(NoteDB.create_note, callback=self._on_note_created)
+
+    def _on_note_created(self, new_id: int | None) -> None:
+        if new_id is None:
+            # The writer already reported the failure.
+            return
         self.model.reload()
         # select newly created note (should be top due to updated_at)
-        for r in range(self.model.rowCount()):
-            if self.model.note_id_at(r) == new_id:
-                self._select_row(r)
-                break
+        row = self.model.row_for_id(new_id)
+        if row is not None:
+            self._select_row(row)
         self.ui.title.setFocus()
         self.ui.title.selectAll()
         self.ui.status.showMessage(f"Created note #{new_id}", 2000)
@@ -293,15 +432,25 @@ class MainWindow(QMainWindow):
         if resp != QMessageBox.Yes:
             return
 
-        self.db.delete_note(note_id)
         self.current_note_id = None
         self._dirty = False
+        self.writer.submit(
+            NoteDB.delete_note,
+            note_id,
+            callback=partial(self._on_note_deleted, note_id),
+        )
+
+    def _on_note_deleted(self, note_id: int, deleted: bool | None) -> None:
         self.model.reload()
         if self.model.rowCount() > 0:
             self._select_row(0)
+            if self.current_note_id is None:
+                # Row 0 was already selected (e.g. the delete failed); load it here.
+                self._load_note(self.model.note_id_at(0))
         else:
             self._load_note(None)
-        self.ui.status.showMessage(f"Deleted note #{note_id}", 2500)
+        if deleted:
+            self.ui.status.showMessage(f"Deleted note #{note_id}", 2500)
 
     def export_json(self) -> None:
         self._commit_note()
@@ -314,7 +463,8 @@ class MainWindow(QMainWindow):
         if not path_str:
             return
         path = Path(path_str)
-        notes = self.db.all_notes_as_dicts()
+        self.writer.flush()
+        notes = self.db.iter_notes_as_dicts()
 
         worker = FunctionWorker(export_notes_to_json, path, notes)
         worker.signals.finished.connect(self._on_export_done)
@@ -368,16 +518,13 @@ class MainWindow(QMainWindow):
         if resp != QMessageBox.Yes:
             return
 
-        # Background step 2: import into DB (fast usually, but keep UI responsive)
-        def do_import():
-            inserted, updated = self.db.import_notes(notes, merge=True)
-            return ImportResult(inserted=inserted, updated=updated)
-
-        try:
-            inserted, updated = self.db.import_notes(notes, merge=True)
-            self._on_import_done(ImportResult(inserted, updated))
-        except Exception as e:
-            QMessageBox.critical(self, "Import failed", str(e))
+        # Background step 2: merge on the writer thread, after any queued saves
+        self.writer.submit(
+            bulk_import,
+            notes,
+            callback=self._on_import_done,
+            on_error=self._on_import_failed,
+        )
         self.ui.status.showMessage("Importing…", 2000)
 
     def _on_import_done(self, result: object) -> None:
@@ -392,6 +539,10 @@ class MainWindow(QMainWindow):
             )
             self.ui.status.showMessage("Import complete.", 2500)
 
+    def _on_import_failed(self, msg: str) -> None:
+        self.ui.status.showMessage("Import failed.", 2500)
+        QMessageBox.critical(self, "Import failed", msg)
+
     def about(self) -> None:
         QMessageBox.information(
             self,
@@ -1,14 +1,16 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Any
 
 from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
 
-from database import Note, NoteDB
+from database import PAGE_SIZE, NoteDB
 
 
+@lru_cache(maxsize=4096)
 def _fmt_dt(iso_str: str) -> str:
     try:
         dt_utc = datetime.fromisoformat(iso_str.replace("Z", "+00:00"))
@@ -18,12 +20,17 @@ def _fmt_dt(iso_str: str) -> str:
         return iso_str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class NoteRow:
     id: int
     title: str
     tags: str
     updated_at: str
+    # Formatted once per row rather than on every paint of the Updated column
+    display_updated: str = field(init=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "display_updated", _fmt_dt(self.updated_at))
 
 
 class NotesTableModel(QAbstractTableModel):
@@ -37,23 +44,143 @@ class NotesTableModel(QAbstractTableModel):
         super().__init__()
         self.db = db
         self._rows: list[NoteRow] = []
+        self._id_to_row: dict[int, int] = {}
         self._search = ""
         self._tag_filter = ""
-
-    def set_filters(self, search: str, tag_filter: str) -> None:
+        self._page_size = PAGE_SIZE
+        self._ranked = False
+        self._has_more = False
+
+    def set_filters(
+        self,
+        search: str,
+        tag_filter: str,
+        page_size: int = PAGE_SIZE,
+        ranked: bool = False,
+    ) -> None:
+        """ranked orders search matches by relevance (bm25) instead of recency."""
         self._search = search
         self._tag_filter = tag_filter
+        self._page_size = page_size
+        self._ranked = ranked
         self.reload()
 
     def reload(self) -> None:
+        """
+        Re-query the first page (later pages come via fetchMore) and apply it as
+        row removals, insertions and changes, so the view keeps its selection
+        and delegate state. Falls back to a full reset when most rows differ.
+        """
+        new_rows = [NoteRow(*r) for r in self._fetch_page(0)]
+        if self._apply_diff(new_rows):
+            return
         self.beginResetModel()
-        notes = self.db.list_notes(search=self._search, tag_filter=self._tag_filter)
-        self._rows = [
-            NoteRow(id=n.id, title=n.title, tags=n.tags, updated_at=n.updated_at)
-            for n in notes
-        ]
+        self._rows = new_rows
+        self._id_to_row = {r.id: i for i, r in enumerate(new_rows)}
         self.endResetModel()
 
+    def _apply_diff(self, new_rows: list[NoteRow]) -> bool:
+        old_ids = {r.id for r in self._rows}
+        new_ids = {r.id for r in new_rows}
+        kept_old = [r.id for r in self._rows if r.id in new_ids]
+        kept_new = [r.id for r in new_rows if r.id in old_ids]
+        if kept_old != kept_new:
+            # Surviving rows were reordered; moves aren't worth diffing.
+            return False
+        changed = (len(self._rows) - len(kept_old)) + (len(new_rows) - len(kept_new))
+        if changed > max(len(self._rows), len(new_rows)) // 2:
+            return False
+
+        # Removals bottom-up, one signal per contiguous run
+        row = len(self._rows) - 1
+        while row >= 0:
+            if self._rows[row].id in new_ids:
+                row -= 1
+                continue
+            end = row
+            while row >= 0 and self._rows[row].id not in new_ids:
+                row -= 1
+            self.beginRemoveRows(QModelIndex(), row + 1, end)
+            del self._rows[row + 1 : end + 1]
+            self.endRemoveRows()
+
+        # Insertions top-down; rows before `start` already match new_rows
+        row = 0
+        while row < len(new_rows):
+            if new_rows[row].id in old_ids:
+                row += 1
+                continue
+            start = row
+            while row < len(new_rows) and new_rows[row].id not in old_ids:
+                row += 1
+            self.beginInsertRows(QModelIndex(), start, row - 1)
+            self._rows[start:start] = new_rows[start:row]
+            self.endInsertRows()
+
+        for i, new in enumerate(new_rows):
+            if self._rows[i] != new:
+                self._rows[i] = new
+                self.dataChanged.emit(self.index(i, 0), self.index(i, self.COL_UPDATED))
+        self._id_to_row = {r.id: i for i, r in enumerate(self._rows)}
+        return True
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and self._has_more
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:
+        if parent.isValid() or not self._has_more:
+            return
+        page = self._fetch_page(len(self._rows))
+        if not page:
+            return
+        start = len(self._rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(page) - 1)
+        self._append_rows(page)
+        self.endInsertRows()
+
+    def _fetch_page(self, offset: int) -> list[tuple[int, str, str, str]]:
+        page = self.db.list_note_rows(
+            search=self._search,
+            tag_filter=self._tag_filter,
+            limit=self._page_size,
+            offset=offset,
+            ranked=self._ranked,
+        )
+        # A short page means we've reached the end.
+        self._has_more = len(page) == self._page_size
+        return page
+
+    def _append_rows(self, page: list[tuple[int, str, str, str]]) -> None:
+        start = len(self._rows)
+        self._rows.extend(NoteRow(*r) for r in page)
+        for i in range(start, len(self._rows)):
+            self._id_to_row[self._rows[i].id] = i
+
+    def row_for_id(self, note_id: int) -> int | None:
+        return self._id_to_row.get(note_id)
+
+    def row_updated(self, note_id: int, title: str, tags: str, updated_at: str) -> None:
+        """
+        Patch one edited note in place and move it to the top (the list is
+        ordered by updated_at desc) without another round-trip to the database.
+        Ranked search results keep their position.
+        """
+        row = self._id_to_row.get(note_id)
+        if row is None:
+            return
+        ranked = self._ranked and bool(self._search.strip())
+        if row > 0 and not ranked:
+            self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), 0)
+            self._rows.insert(0, self._rows.pop(row))
+            for i in range(row + 1):
+                self._id_to_row[self._rows[i].id] = i
+            self.endMoveRows()
+            row = 0
+        self._rows[row] = NoteRow(
+            id=note_id, title=title, tags=tags, updated_at=updated_at
+        )
+        self.dataChanged.emit(self.index(row, 0), self.index(row, self.COL_UPDATED))
+
     def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
         return 0 if parent.isValid() else len(self._rows)
 
@@ -81,7 +208,7 @@ class NotesTableModel(QAbstractTableModel):
             if col == self.COL_TAGS:
                 return row.tags
             if col == self.COL_UPDATED:
-                return _fmt_dt(row.updated_at)
+                return row.display_updated
 
         if role == Qt.UserRole:
             return row.id
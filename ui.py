@@ -13,12 +13,12 @@ from PySide6.QtWidgets import (
     QMainWindow,
     QMenu,
     QMessageBox,
+    QPlainTextEdit,
     QPushButton,
     QSplitter,
     QStatusBar,
     QTableView,
     QTextBrowser,
-    QTextEdit,
     QToolBar,
     QVBoxLayout,
     QWidget,
@@ -30,7 +30,8 @@ class MainWindowUI:
     Pure UI wiring: creates widgets/actions and exposes them for the controller (main.py).
     """
 
-    def setup(self, win: QMainWindow) -> None:
+    def setup_core(self, win: QMainWindow) -> None:
+        """Widgets needed for the first paint: list, editor, preview, status bar."""
         win.setWindowTitle("Noteforge — Offline Markdown Notes")
 
         # Central layout
@@ -61,9 +62,17 @@ class MainWindowUI:
         self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.table.setSelectionMode(QAbstractItemView.SingleSelection)
         self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
-        self.table.horizontalHeader().setStretchLastSection(True)
-        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        # Only Updated is sized to contents; measuring Title/Tags would call
+        # data() for every row and defeat lazy paging.
+        hdr = self.table.horizontalHeader()
+        hdr.setSectionResizeMode(0, QHeaderView.Interactive)
+        hdr.setSectionResizeMode(1, QHeaderView.Interactive)
+        hdr.setSectionResizeMode(2, QHeaderView.ResizeToContents)
+        hdr.setStretchLastSection(False)
+        self.table.setColumnWidth(0, 300)
+        self.table.setColumnWidth(1, 180)
         self.table.verticalHeader().setVisible(False)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         left_layout.addWidget(self.table, 1)
 
         btn_row = QHBoxLayout()
@@ -91,7 +100,7 @@ class MainWindowUI:
 
         self.editor_split = QSplitter(Qt.Horizontal)
 
-        self.body = QTextEdit()
+        self.body = QPlainTextEdit()
         self.body.setPlaceholderText("# Markdown note\n\nStart typing…")
 
         self.preview = QTextBrowser()
@@ -109,6 +118,12 @@ class MainWindowUI:
         self.splitter.setStretchFactor(0, 1)
         self.splitter.setStretchFactor(1, 3)
 
+        # Status bar
+        self.status = QStatusBar()
+        win.setStatusBar(self.status)
+
+    def setup_chrome(self, win: QMainWindow) -> None:
+        """Toolbar, actions and menus; built after the window is first shown."""
         # Toolbar / actions
         self.toolbar = QToolBar("Main")
         self.toolbar.setObjectName("main_toolbar")
@@ -150,7 +165,3 @@ class MainWindowUI:
 
         help_menu = menu.addMenu("&Help")
         help_menu.addAction(self.act_about)
-
-        # Status bar
-        self.status = QStatusBar()
-        win.setStatusBar(self.status)
@@ -1,11 +1,20 @@
 from __future__ import annotations
 
 import json
+import queue
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any, Callable, Iterable
 
-from PySide6.QtCore import QObject, QRunnable, Signal, Slot
+from PySide6.QtCore import QObject, QRunnable, QThread, Signal, Slot
+from PySide6.QtGui import QFont, QTextDocument
+
+from database import NoteDB
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; the stdlib json module is the fallback
+    orjson = None
 
 
 class WorkerSignals(QObject):
@@ -37,6 +46,82 @@ class FunctionWorker(QRunnable):
             self.signals.error.emit(str(e))
 
 
+class WriterThread(QThread):
+    """
+    Serialize database writes on a dedicated thread with its own connection.
+    - submit(fn, *args, callback=...) queues fn(db, *args) against the writer's NoteDB
+    - callback(result) runs on the thread that owns this object (the GUI thread)
+    - Emits error(str) when a write fails; callback then still runs, with None
+    - submit(..., on_error=...) instead routes that failure's message to on_error(str),
+      also on the GUI thread, and skips both error and callback
+    """
+
+    error = Signal(str)
+    _done = Signal(object, object)
+
+    def __init__(self, db_path: Path, parent: QObject | None = None):
+        super().__init__(parent)
+        # Opened here so connection errors surface on the caller's thread.
+        self.db = NoteDB(db_path, check_same_thread=False, readonly_mirror=False)
+        self.write_queue: queue.Queue[Any] = queue.Queue()
+        self._done.connect(self._dispatch)
+
+    def submit(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        callback: Callable[[Any], None] | None = None,
+        on_error: Callable[[str], None] | None = None,
+    ) -> None:
+        self.write_queue.put((fn, args, callback, on_error))
+
+    def flush(self) -> None:
+        """Block until every queued write has been applied."""
+        self.write_queue.join()
+
+    def stop(self) -> None:
+        """Apply pending writes, then stop the thread and close its connection."""
+        self.write_queue.put(None)
+        self.wait()
+        self.db.close()
+
+    def run(self) -> None:
+        while True:
+            item = self.write_queue.get()
+            try:
+                if item is None:
+                    return
+                fn, args, callback, on_error = item
+                try:
+                    result = fn(self.db, *args)
+                except Exception as e:
+                    if on_error is not None:
+                        self._done.emit(on_error, str(e))
+                        continue
+                    self.error.emit(str(e))
+                    result = None
+                if callback is not None:
+                    self._done.emit(callback, result)
+            finally:
+                self.write_queue.task_done()
+
+    @Slot(object, object)
+    def _dispatch(self, callback: Callable[[Any], None], result: Any) -> None:
+        callback(result)
+
+
+def render_markdown(md: str, font: QFont, target: QThread) -> QTextDocument:
+    """
+    Parse Markdown into a QTextDocument off the GUI thread, then hand the
+    document over to `target` so a widget living there can display it.
+    """
+    doc = QTextDocument()
+    doc.setDefaultFont(font)
+    doc.setMarkdown(md)
+    doc.moveToThread(target)
+    return doc
+
+
 @dataclass(frozen=True)
 class ExportResult:
     path: str
@@ -49,19 +134,39 @@ class ImportResult:
     updated: int
 
 
-def export_notes_to_json(path: Path, notes: list[dict[str, Any]]) -> ExportResult:
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, indent=2)
+
+
+def _encode_note(note: dict[str, Any]) -> str:
+    # Both encoders produce the same indent=2 layout, so exports stay identical.
+    if orjson is not None:
+        return orjson.dumps(note, option=orjson.OPT_INDENT_2).decode()
+    return _JSON_ENCODER.encode(note)
+
+
+def export_notes_to_json(path: Path, notes: Iterable[dict[str, Any]]) -> ExportResult:
+    """
+    Stream notes to disk one at a time. The output is byte-identical to
+    json.dumps(payload, ensure_ascii=False, indent=2) without holding it in memory.
+    """
     path.parent.mkdir(parents=True, exist_ok=True)
-    payload = {
-        "app": "Noteforge",
-        "version": 1,
-        "notes": notes,
-    }
-    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-    return ExportResult(path=str(path), count=len(notes))
+    count = 0
+    with path.open("w", encoding="utf-8") as f:
+        f.write('{\n  "app": "Noteforge",\n  "version": 1,\n  "notes": [')
+        for note in notes:
+            f.write(",\n    " if count else "\n    ")
+            # String values never contain raw newlines, so this only re-indents.
+            f.write(_encode_note(note).replace("\n", "\n    "))
+            count += 1
+        f.write("\n  ]\n}" if count else "]\n}")
+    return ExportResult(path=str(path), count=count)
 
 
 def import_notes_from_json(path: Path) -> list[dict[str, Any]]:
-    data = json.loads(path.read_text(encoding="utf-8"))
+    if orjson is not None:
+        data = orjson.loads(path.read_bytes())
+    else:
+        data = json.loads(path.read_text(encoding="utf-8"))
     notes = data.get("notes")
     if not isinstance(notes, list):
         raise ValueError("Invalid file: expected top-level key 'notes' as a list.")
@@ -70,3 +175,9 @@ def import_notes_from_json(path: Path) -> list[dict[str, Any]]:
         if isinstance(n, dict):
             cleaned.append(n)
     return cleaned
+
+
+def bulk_import(db: NoteDB, notes: list[dict[str, Any]]) -> ImportResult:
+    """Merge notes in a single transaction. Submit via WriterThread so db is its own."""
+    inserted, updated = db.import_notes(notes, merge=True)
+    return ImportResult(inserted=inserted, updated=updated)